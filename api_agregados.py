@@ -0,0 +1,235 @@
+# API DE AGREGADOS - Endpoint HTTP local, somente leitura, com os mesmos números do dashboard (JSON/CSV)
+#
+# Uso:
+#   python api_agregados.py                      -> http://127.0.0.1:8502
+#   python api_agregados.py --host 0.0.0.0 --porta 8600 --entrada base_consolidada.xlsx
+#
+# Endpoints (todos aceitam os filtros entidade=, mes=MM/AAAA, sistema= e formato=json|csv):
+#   GET /api/totais     -> Total de pedidos por Mês/Ano e Sistema (KPIs mensais)
+#   GET /api/top?n=3    -> Top N entidades por Mês/Ano (Leaderboard)
+#   GET /api/pivot      -> Tabela pivotada (mesmo layout do download 'Tabela Pivotada')
+#   GET /api/versao     -> Versão dos dados em uso
+#
+# As respostas ficam em cache por versão dos dados (data de modificação e tamanho da base consolidada) e trazem
+# ETag: requisições com If-None-Match recebem 304 sem recalcular nada. A base é relida automaticamente quando
+# o dashboard grava uma nova versão de base_consolidada.xlsx.
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from relatorio_comum import (
+    CONSOLIDATED_FILE, MONTH_COL_NAME, MONTH_FORMAT, COUNT_COL_NAME,
+    load_consolidated_file, prepare_base_pivot, compact_history, filter_base, build_pivot, monthly_system_totals, top_entities_by_month,
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+MAX_CACHE_ENTRIES = 512
+MAX_TOP_N = 100
+
+CONTENT_TYPES = {
+    'json': 'application/json; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+class BadRequest(Exception):
+    """Parâmetro inválido na requisição (HTTP 400)."""
+
+# ----------------------------------------------------
+# Base de Dados Versionada e Cache de Respostas
+# ----------------------------------------------------
+
+class AggregateStore:
+    """Mantém a base pivotada em memória e o cache de respostas da versão atual da base consolidada."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = None
+        self.df_base_pivot = None
+        self.cache = OrderedDict()
+
+    def current(self):
+        """Retorna (versão, base pivotada), relendo a base consolidada se o arquivo mudou em disco."""
+        stat = os.stat(self.file_path)
+        version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        with self.lock:
+            if version != self.version:
+                df_final_consolidated = load_consolidated_file(self.file_path)
+                if df_final_consolidated.empty:
+                    raise ValueError(f"A base consolidada '{self.file_path}' está vazia.")
+                _, df_base_pivot = prepare_base_pivot(df_final_consolidated)
+                self.df_base_pivot = compact_history(df_base_pivot)
+                self.version = version
+                self.loaded_at = datetime.now()
+                # Respostas de versões anteriores nunca mais serão servidas
+                self.cache.clear()
+            return self.version, self.df_base_pivot
+
+    def get(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.cache[key] = entry
+            if len(self.cache) > MAX_CACHE_ENTRIES:
+                self.cache.popitem(last=False)
+
+# ----------------------------------------------------
+# Endpoints
+# ----------------------------------------------------
+
+def _filters(params):
+    return (
+        params.get('entidade', 'Todas'),
+        params.get('mes', 'Todos'),
+        params.get('sistema', 'Todos'),
+    )
+
+def endpoint_totais(df_base_pivot, params):
+    _, df_visual_filtrada = filter_base(df_base_pivot, *_filters(params))
+    df_totais = monthly_system_totals(df_visual_filtrada)
+    df_totais['Total'] = df_totais['Reserve'] + df_totais['ARGOIT']
+    return df_totais
+
+def endpoint_top(df_base_pivot, params):
+    try:
+        top_n = int(params.get('n', 3))
+    except ValueError:
+        raise BadRequest("O parâmetro 'n' deve ser um número inteiro.")
+    if not 1 <= top_n <= MAX_TOP_N:
+        raise BadRequest(f"O parâmetro 'n' deve estar entre 1 e {MAX_TOP_N}.")
+    _, df_visual_filtrada = filter_base(df_base_pivot, *_filters(params))
+    return top_entities_by_month(df_visual_filtrada, top_n)
+
+def endpoint_pivot(df_base_pivot, params):
+    entidade, mes, sistema = _filters(params)
+    _, df_visual_filtrada = filter_base(df_base_pivot, entidade, mes, sistema)
+    if df_visual_filtrada.empty:
+        return df_visual_filtrada.iloc[0:0, 0:0]
+    return build_pivot(df_visual_filtrada, sistema).reset_index()
+
+ENDPOINTS = {
+    '/api/totais': endpoint_totais,
+    '/api/top': endpoint_top,
+    '/api/pivot': endpoint_pivot,
+}
+
+def render(df, formato):
+    """Serializa o DataFrame em JSON (lista de registros) ou CSV."""
+    if formato == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    return df.to_json(orient='records', force_ascii=False).encode('utf-8')
+
+# ----------------------------------------------------
+# Servidor HTTP
+# ----------------------------------------------------
+
+class AggregateRequestHandler(BaseHTTPRequestHandler):
+    store = None # Definido em make_server
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        # Apenas o primeiro valor de cada parâmetro é considerado
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        try:
+            version, df_base_pivot = self.store.current()
+        except FileNotFoundError:
+            return self.send_error_json(503, f"O arquivo '{self.store.file_path}' não foi encontrado.")
+        except Exception as e:
+            return self.send_error_json(503, f"Erro ao carregar a base consolidada: {type(e).__name__} - {e}")
+
+        if url.path == '/api/versao':
+            body = json.dumps({
+                'versao': version,
+                'arquivo': self.store.file_path,
+                'carregado_em': self.store.loaded_at.isoformat(timespec='seconds'),
+                'linhas_em_memoria': len(df_base_pivot),
+                'pedidos': int(df_base_pivot[COUNT_COL_NAME].sum()),
+                'meses': sorted(df_base_pivot[MONTH_COL_NAME].unique().tolist(), key=lambda x: datetime.strptime(x, MONTH_FORMAT)),
+            }, ensure_ascii=False).encode('utf-8')
+            return self.send_body(200, CONTENT_TYPES['json'], body)
+
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            return self.send_error_json(404, f"Endpoint '{url.path}' não encontrado. Disponíveis: {', '.join(sorted(ENDPOINTS))}, /api/versao.")
+
+        formato = params.pop('formato', 'json')
+        if formato not in CONTENT_TYPES:
+            return self.send_error_json(400, "O parâmetro 'formato' deve ser 'json' ou 'csv'.")
+
+        # A ETag depende apenas da versão dos dados e da requisição normalizada: o 304 não precisa do cache
+        cache_key = (version, url.path, formato, tuple(sorted(params.items())))
+        etag = '"' + hashlib.sha1(repr(cache_key).encode('utf-8')).hexdigest() + '"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            return self.send_body(304, None, b'', etag)
+
+        body = self.store.get(cache_key)
+        if body is None:
+            try:
+                body = render(endpoint(df_base_pivot, params), formato)
+            except BadRequest as e:
+                return self.send_error_json(400, str(e))
+            except Exception as e:
+                return self.send_error_json(500, f"Erro ao calcular o agregado: {type(e).__name__} - {e}")
+            self.store.put(cache_key, body)
+
+        self.send_body(200, CONTENT_TYPES[formato], body, etag)
+
+    def send_body(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            # Os clientes podem guardar a resposta, mas devem revalidar (If-None-Match) a cada uso
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        body = json.dumps({'erro': message}, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, CONTENT_TYPES['json'], body)
+
+def make_server(file_path=CONSOLIDATED_FILE, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Cria o servidor HTTP (ainda não iniciado) servindo os agregados da base consolidada informada."""
+    handler = type('Handler', (AggregateRequestHandler,), {'store': AggregateStore(file_path)})
+    return ThreadingHTTPServer((host, port), handler)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP local (somente leitura) com os agregados do dashboard.")
+    parser.add_argument('--entrada', default=CONSOLIDATED_FILE, help=f"Base consolidada (padrão: {CONSOLIDATED_FILE}).")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Endereço de escuta (padrão: {DEFAULT_HOST}).")
+    parser.add_argument('--porta', type=int, default=DEFAULT_PORT, help=f"Porta de escuta (padrão: {DEFAULT_PORT}).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = make_server(args.entrada, args.host, args.porta)
+    print(f"🚀 API de agregados em http://{args.host}:{args.porta}/api/totais (Ctrl+C para encerrar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("ℹ️ Encerrando a API.")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
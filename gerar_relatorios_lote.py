@@ -0,0 +1,218 @@
+# GERADOR EM LOTE - Tabelas Pivotadas formatadas (to_excel_styled) por Entidade / Mês / Sistema, em paralelo
+#
+# Uso:
+#   python gerar_relatorios_lote.py                                   -> uma tabela por Entidade (todos os meses e sistemas)
+#   python gerar_relatorios_lote.py --meses 01/2026                   -> uma tabela por Entidade, apenas 01/2026
+#   python gerar_relatorios_lote.py --meses cada --sistemas cada      -> todas as combinações Entidade x Mês x Sistema
+#   python gerar_relatorios_lote.py --entidades "GRUPO X" "GRUPO Y" --saida relatorios_jan --processos 4
+#
+# O valor especial 'cada' expande para cada valor distinto da base; 'Todas'/'Todos' equivale ao filtro sem seleção.
+# Gera um XLSX por combinação na pasta de saída, além de 'manifesto.csv' e 'resumo.json' (tempos de execução).
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from itertools import product
+
+import pandas as pd
+
+from relatorio_comum import (
+    CONSOLIDATED_FILE, ENTITY_COL_NAME, MONTH_COL_NAME, MONTH_FORMAT, COUNT_COL_NAME, SYSTEM_COL_NAME,
+    load_consolidated_file, prepare_base_pivot, compact_history, filter_base, build_pivot, pivot_file_name, to_excel_styled,
+)
+
+EXPAND_ALL = 'cada'
+DEFAULT_OUTPUT_DIR = 'relatorios_lote'
+MANIFEST_FILE = 'manifesto.csv'
+SUMMARY_FILE = 'resumo.json'
+
+# Base pivotada carregada uma única vez por processo de trabalho (ver _init_worker)
+_worker_base_pivot = None
+
+# ----------------------------------------------------
+# Processos de Trabalho
+# ----------------------------------------------------
+
+def _init_worker(df_base_pivot):
+    """Recebe a base pivotada uma única vez por processo, evitando reenviá-la a cada tarefa."""
+    global _worker_base_pivot
+    _worker_base_pivot = df_base_pivot
+
+def render_pivot_file(entidade, mes, sistema, file_name, output_dir):
+    """Filtra, pivota e grava a tabela formatada de uma combinação. Retorna a linha do manifesto."""
+    start = time.perf_counter()
+    entry = {
+        'arquivo': file_name, 'entidade': entidade, 'mes': mes, 'sistema': sistema,
+        'linhas': 0, 'total_pedidos': 0, 'status': 'ok', 'erro': '', 'segundos': 0.0,
+    }
+    try:
+        _, df_visual_filtrada = filter_base(_worker_base_pivot, entidade, mes, sistema)
+
+        if df_visual_filtrada.empty:
+            entry['arquivo'] = ''
+            entry['status'] = 'vazio'
+        else:
+            df_pivot = build_pivot(df_visual_filtrada, sistema)
+            with open(os.path.join(output_dir, file_name), 'wb') as f:
+                f.write(to_excel_styled(df_pivot))
+            entry['linhas'] = len(df_pivot) - 1 # Desconsidera a linha de 'Total Geral'
+            entry['total_pedidos'] = int(df_visual_filtrada[COUNT_COL_NAME].sum())
+    except Exception as e:
+        entry['arquivo'] = ''
+        entry['status'] = 'erro'
+        entry['erro'] = f"{type(e).__name__} - {e}"
+
+    entry['segundos'] = round(time.perf_counter() - start, 4)
+    return entry
+
+# ----------------------------------------------------
+# Combinações de Filtros
+# ----------------------------------------------------
+
+def expand_values(requested, available, all_label):
+    """Expande 'cada' para todos os valores distintos da base e valida os demais valores informados."""
+    values = []
+    for value in requested:
+        if value == EXPAND_ALL:
+            values.extend(available)
+        elif value == all_label or value in available:
+            values.append(value)
+        else:
+            print(f"⚠️ Valor '{value}' não encontrado na base. Ignorado.")
+    # Remove duplicatas mantendo a ordem
+    return list(dict.fromkeys(values))
+
+def unique_file_names(combinations):
+    """
+    Nome de arquivo de cada combinação. Entidades distintas podem gerar o mesmo nome (ex.: 'A B' e 'A_B');
+    nesses casos cada arquivo recebe um sufixo com o hash da combinação, para que nenhum sobrescreva outro.
+    """
+    file_names = [pivot_file_name(entidade, mes, sistema) for entidade, mes, sistema in combinations]
+
+    # Comparação sem diferenciar maiúsculas/minúsculas (sistemas de arquivos do Windows e macOS)
+    name_counts = {}
+    for file_name in file_names:
+        name_counts[file_name.lower()] = name_counts.get(file_name.lower(), 0) + 1
+
+    unique_names = []
+    for (entidade, mes, sistema), file_name in zip(combinations, file_names):
+        if name_counts[file_name.lower()] > 1:
+            digest = hashlib.sha1(f"{entidade}|{mes}|{sistema}".encode('utf-8')).hexdigest()[:8]
+            renamed = f"{file_name[:-len('.xlsx')]}_{digest}.xlsx"
+            print(f"⚠️ Nome de arquivo repetido para '{entidade}' / {mes} / {sistema}. Gravado como '{renamed}'.")
+            file_name = renamed
+        unique_names.append(file_name)
+    return unique_names
+
+def build_combinations(df_base_pivot, entidades, meses, sistemas):
+    """Retorna a lista de combinações (Entidade, Mês/Ano, Sistema, nome do arquivo) a gerar, com nomes únicos."""
+    available_entidades = sorted(df_base_pivot[ENTITY_COL_NAME].unique().tolist())
+    available_meses = sorted(df_base_pivot[MONTH_COL_NAME].unique().tolist(), key=lambda x: pd.to_datetime(x, format=MONTH_FORMAT))
+    available_sistemas = sorted(df_base_pivot[SYSTEM_COL_NAME].unique().tolist())
+
+    combinations = list(product(
+        expand_values(entidades, available_entidades, 'Todas'),
+        expand_values(meses, available_meses, 'Todos'),
+        expand_values(sistemas, available_sistemas, 'Todos'),
+    ))
+    return [combination + (file_name,) for combination, file_name in zip(combinations, unique_file_names(combinations))]
+
+# ----------------------------------------------------
+# Execução em Lote
+# ----------------------------------------------------
+
+def run_batch(df_base_pivot, combinations, output_dir, processes=None):
+    """Gera as tabelas em paralelo e grava o manifesto e o resumo de tempos na pasta de saída."""
+    os.makedirs(output_dir, exist_ok=True)
+    processes = processes or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(df_base_pivot,)) as executor:
+        futures = [
+            executor.submit(render_pivot_file, entidade, mes, sistema, file_name, output_dir)
+            for entidade, mes, sistema, file_name in combinations
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            entries.append(entry)
+            if entry['status'] == 'erro':
+                print(f"❌ {entry['entidade']} / {entry['mes']} / {entry['sistema']}: {entry['erro']}")
+    wall_seconds = time.perf_counter() - start
+
+    # Meses em ordem cronológica ('MM/AAAA' não ordena como texto); 'Todos' fica ao final de cada entidade
+    df_manifest = pd.DataFrame(entries).sort_values(
+        ['entidade', 'mes', 'sistema'],
+        key=lambda col: pd.to_datetime(col, format=MONTH_FORMAT, errors='coerce') if col.name == 'mes' else col
+    )
+    df_manifest.to_csv(os.path.join(output_dir, MANIFEST_FILE), index=False, encoding='utf-8-sig')
+
+    task_seconds = df_manifest['segundos'] if not df_manifest.empty else pd.Series(dtype=float)
+    summary = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'processos': processes,
+        'combinacoes': len(combinations),
+        'arquivos_gerados': int((df_manifest['status'] == 'ok').sum()) if not df_manifest.empty else 0,
+        'vazios': int((df_manifest['status'] == 'vazio').sum()) if not df_manifest.empty else 0,
+        'erros': int((df_manifest['status'] == 'erro').sum()) if not df_manifest.empty else 0,
+        'segundos_total': round(wall_seconds, 3),
+        'segundos_soma_tarefas': round(float(task_seconds.sum()), 3),
+        'segundos_media_tarefa': round(float(task_seconds.mean()), 4) if len(task_seconds) else 0.0,
+        'segundos_max_tarefa': round(float(task_seconds.max()), 4) if len(task_seconds) else 0.0,
+    }
+    # Paralelismo efetivo: tempo somado das tarefas dividido pelo tempo real decorrido. Não é o ganho sobre uma
+    # execução com 1 processo: com núcleos disputados cada tarefa demora mais e a soma cresce junto
+    summary['paralelismo_efetivo'] = round(summary['segundos_soma_tarefas'] / wall_seconds, 2) if wall_seconds > 0 else 0.0
+
+    with open(os.path.join(output_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    return df_manifest, summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gera em lote as tabelas pivotadas formatadas por Entidade/Mês/Sistema.")
+    parser.add_argument('--entrada', default=CONSOLIDATED_FILE, help=f"Base consolidada (padrão: {CONSOLIDATED_FILE}).")
+    parser.add_argument('--saida', default=DEFAULT_OUTPUT_DIR, help=f"Pasta de saída (padrão: {DEFAULT_OUTPUT_DIR}).")
+    parser.add_argument('--entidades', nargs='+', default=[EXPAND_ALL], help="Entidades, 'Todas' ou 'cada' (padrão: cada).")
+    parser.add_argument('--meses', nargs='+', default=['Todos'], help="Meses (MM/AAAA), 'Todos' ou 'cada' (padrão: Todos).")
+    parser.add_argument('--sistemas', nargs='+', default=['Todos'], help="Sistemas, 'Todos' ou 'cada' (padrão: Todos).")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos paralelos (padrão: nº de núcleos).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not os.path.exists(args.entrada):
+        print(f"❌ O arquivo '{args.entrada}' não foi encontrado. Abra o dashboard para gerar a base consolidada.")
+        return 1
+
+    print(f"🔄 Carregando a base consolidada '{args.entrada}'...")
+    df_final_consolidated = load_consolidated_file(args.entrada)
+    if df_final_consolidated.empty:
+        print("❌ A base consolidada está vazia.")
+        return 1
+    _, df_base_pivot = prepare_base_pivot(df_final_consolidated)
+    # Base menor para enviar aos processos de trabalho (os totais não mudam)
+    df_base_pivot = compact_history(df_base_pivot)
+
+    combinations = build_combinations(df_base_pivot, args.entidades, args.meses, args.sistemas)
+    if not combinations:
+        print("❌ Nenhuma combinação de filtros válida para gerar.")
+        return 1
+
+    print(f"🚀 Gerando {len(combinations):,.0f} tabelas em '{args.saida}'...")
+    _, summary = run_batch(df_base_pivot, combinations, args.saida, args.processos)
+
+    print(
+        f"✅ {summary['arquivos_gerados']} arquivos gerados, {summary['vazios']} sem dados, {summary['erros']} com erro "
+        f"em {summary['segundos_total']:.2f}s ({summary['processos']} processos, paralelismo efetivo {summary['paralelismo_efetivo']:.2f}x = soma das tarefas / tempo real)."
+    )
+    print(f"ℹ️ Manifesto: {os.path.join(args.saida, MANIFEST_FILE)} | Resumo: {os.path.join(args.saida, SUMMARY_FILE)}")
+    return 1 if summary['erros'] else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
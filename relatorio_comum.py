@@ -0,0 +1,397 @@
+# FUNÇÕES COMPARTILHADAS - Usadas pelo dashboard (relatorio_pedidos_reserve.py) e pelas ferramentas headless
+# (Não importa o Streamlit: pode ser usado em scripts de linha de comando e em processos paralelos)
+
+import io
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# --- 1. Configurações e Variáveis ---
+
+# Nomes de Colunas PADRÕES para unificação
+DATE_COL_NAME = 'data'
+ID_COL_NAME = 'pedido'
+GROUP_CODE_COL = 'codigo grupo'
+EMP_COL_NAME = 'empresa'
+GROUP_COL_NAME = 'nome grupo'
+SYSTEM_COL_NAME = 'Sistema'
+
+# Colunas derivadas usadas pelo dashboard e pelo pivotamento
+ENTITY_COL_NAME = 'Entidade de Consolidação'
+MONTH_COL_NAME = 'Mês/Ano'
+COUNT_COL_NAME = 'PKI Pedidos'
+MONTH_FORMAT = '%m/%Y'
+DAY_COL_NAME = 'Dia'
+
+# Granularidades da tendência diária (regras de resample do pandas)
+ROLLUP_FREQUENCIES = {'Dia': 'D', 'Semana': 'W-MON', 'Mês': 'MS'}
+
+# Arquivo de Saída Consolidado
+CONSOLIDATED_FILE = 'base_consolidada.xlsx'
+CONSOLIDATED_SHEET_NAME = 'Consolidado'
+
+# Retenção do histórico em memória: os últimos N meses ficam no nível de pedido e os meses anteriores
+# são compactados em contagens por (Entidade, Mês/Ano, Sistema). 0 desativa a compactação.
+# O detalhe completo continua em CONSOLIDATED_FILE (armazenamento frio), lido apenas na exportação da base bruta.
+DETAIL_RETENTION_MONTHS = int(os.environ.get('RETENCAO_MESES_DETALHE', 12))
+
+# Cor principal dos estilos (cabeçalhos e totais)
+ORANGE_COLOR = '#ff8c00' # Laranja, usado para Reserve e para o estilo principal
+
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# ----------------------------------------------------
+# Funções Auxiliares de Exportação
+# ----------------------------------------------------
+
+def to_excel(df):
+    """Converte o DataFrame para um buffer de memória XLSX (Dados Brutos)."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name=CONSOLIDATED_SHEET_NAME, index=False)
+    return output.getvalue()
+
+def to_excel_styled(df_pivot):
+    """Converte o DataFrame Pivotado para um buffer de memória XLSX aplicando estilos de totais."""
+    output = io.BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    sheet_name = 'Tabela_Pivotada'
+    df_pivot.to_excel(writer, sheet_name=sheet_name, index=True)
+
+    workbook = writer.book
+    worksheet = writer.sheets[sheet_name]
+
+    # Formatos de cor
+    header_format = workbook.add_format({
+        'bold': True, 'text_wrap': True, 'valign': 'top',
+        'fg_color': ORANGE_COLOR, 'border': 1, 'font_color': 'white'
+    })
+
+    total_format = workbook.add_format({
+        'bold': True, 'fg_color': ORANGE_COLOR, 'border': 1,
+        'font_color': 'white', 'num_format': '#,##0'
+    })
+
+    content_format_even = workbook.add_format({
+        'fg_color': 'white', 'border': 1, 'font_color': 'black', 'num_format': '#,##0'
+    })
+
+    content_format_odd = workbook.add_format({
+        'fg_color': '#f0f2f6', 'border': 1, 'font_color': 'black', 'num_format': '#,##0'
+    })
+
+    # Obter dimensões e índice
+    num_rows, num_cols = df_pivot.shape
+    index_cols = len(df_pivot.index.names)
+
+    # 1. Aplicar estilo ao cabeçalho (Colunas)
+    for col_num, value in enumerate(df_pivot.columns.values):
+        worksheet.write(index_cols, col_num + index_cols, value, header_format)
+
+    # 2. Aplicar estilo às células de DADOS, LINHA DE TOTAIS e Índice
+    for row_num, (index, row) in enumerate(df_pivot.iterrows()):
+        is_total_row = (row_num == num_rows - 1)
+
+        # Células de Dados (Meses/Ano - Exceto a última coluna de Total Geral)
+        for col_num in range(num_cols - 1):
+            cell_format = total_format if is_total_row else (content_format_even if row_num % 2 == 0 else content_format_odd)
+            worksheet.write(row_num + index_cols + 1, col_num + index_cols, row.iloc[col_num], cell_format)
+
+        # Célula de Total GERAL (Última Coluna)
+        worksheet.write(row_num + index_cols + 1, num_cols + index_cols - 1, row.iloc[-1], total_format)
+
+        # Células de Índice (Linhas)
+        for i in range(index_cols):
+            index_value = index[i] if index_cols > 1 else index
+            worksheet.write(row_num + index_cols + 1, i, index_value, header_format)
+
+    # Aplicar o formato de cabeçalho ao nome do índice (canto superior esquerdo)
+    for i in range(index_cols):
+        worksheet.write(i, i, df_pivot.index.names[i], header_format)
+
+    # Definir formato de Total Geral no canto inferior direito
+    if num_rows > 0 and num_cols > 0:
+        worksheet.write(num_rows + index_cols, num_cols + index_cols - 1, df_pivot.iloc[-1, -1], total_format)
+
+    writer.close()
+    return output.getvalue()
+
+# ----------------------------------------------------
+# Pré-processamento, Filtros e Pivotamento
+# ----------------------------------------------------
+
+def load_consolidated_file(file_path=CONSOLIDATED_FILE):
+    """Lê a base consolidada já salva em disco (sem incremento) e retorna o DF limpo e único por pedido."""
+    df = pd.read_excel(file_path, engine='openpyxl', sheet_name=CONSOLIDATED_SHEET_NAME)
+    if df.empty:
+        return df
+    df[ID_COL_NAME] = df[ID_COL_NAME].astype(str).str.strip()
+    df[DATE_COL_NAME] = pd.to_datetime(df[DATE_COL_NAME], errors='coerce', dayfirst=True)
+    df = df.dropna(subset=[DATE_COL_NAME])
+    return df.drop_duplicates(subset=[ID_COL_NAME], keep='first').copy()
+
+def prepare_base_pivot(df_final_consolidated):
+    """
+    Cria as colunas de Entidade, Mês/Ano e contador na base consolidada.
+    Retorna a base completa (com as novas colunas) e a base pronta para pivotar.
+    """
+    df_final_consolidated[ENTITY_COL_NAME] = df_final_consolidated[GROUP_COL_NAME].fillna(df_final_consolidated[EMP_COL_NAME])
+    df_final_consolidated[MONTH_COL_NAME] = df_final_consolidated[DATE_COL_NAME].dt.strftime(MONTH_FORMAT)
+    df_final_consolidated[COUNT_COL_NAME] = 1
+
+    # df_base_pivot é a base que será usada para todos os cálculos e visualizações
+    df_base_pivot = df_final_consolidated[[ENTITY_COL_NAME, MONTH_COL_NAME, COUNT_COL_NAME, SYSTEM_COL_NAME, ID_COL_NAME]]
+
+    return df_final_consolidated, df_base_pivot
+
+def detail_cutoff(latest_date, retention_months=DETAIL_RETENTION_MONTHS):
+    """Primeiro dia do mês mais antigo mantido em detalhe: os últimos `retention_months` meses até `latest_date`."""
+    latest_month = pd.Timestamp(latest_date).to_period('M').to_timestamp()
+    return latest_month - pd.DateOffset(months=retention_months - 1)
+
+def compact_history(df_base_pivot, retention_months=DETAIL_RETENTION_MONTHS):
+    """
+    Mantém os últimos `retention_months` meses (contados a partir do mês mais recente da base) no nível de pedido
+    e substitui os meses anteriores por uma linha por (Entidade, Mês/Ano, Sistema), com a contagem em 'PKI Pedidos'.
+    Como KPIs, leaderboard e pivot somam 'PKI Pedidos', os totais continuam idênticos.
+    """
+    if not retention_months or df_base_pivot.empty:
+        return df_base_pivot
+
+    # Converte apenas os meses distintos (e não cada linha) para a data de ordenação
+    month_dates = {month: pd.to_datetime(month, format=MONTH_FORMAT) for month in df_base_pivot[MONTH_COL_NAME].unique()}
+    cutoff = detail_cutoff(max(month_dates.values()), retention_months)
+    recent_months = [month for month, month_date in month_dates.items() if month_date >= cutoff]
+
+    is_recent = df_base_pivot[MONTH_COL_NAME].isin(recent_months)
+    if is_recent.all():
+        return df_base_pivot
+
+    df_compacted = df_base_pivot[~is_recent].groupby(
+        [ENTITY_COL_NAME, MONTH_COL_NAME, SYSTEM_COL_NAME], as_index=False, dropna=False
+    )[COUNT_COL_NAME].sum()
+
+    # As linhas agregadas não têm número de pedido (ID_COL_NAME fica vazio)
+    df_tiered = pd.concat([df_base_pivot[is_recent], df_compacted], ignore_index=True)
+    return df_tiered[df_base_pivot.columns]
+
+def filter_base(df_base_pivot, entidade='Todas', mes='Todos', sistema='Todos'):
+    """
+    Aplica os filtros do dashboard.
+    Retorna o DF filtrado por Entidade e Mês/Ano (base) e o DF filtrado também por Sistema (visual).
+    """
+    df_base_filtrada = df_base_pivot
+
+    if entidade != 'Todas':
+        df_base_filtrada = df_base_filtrada[df_base_filtrada[ENTITY_COL_NAME] == entidade]
+
+    if mes != 'Todos':
+        df_base_filtrada = df_base_filtrada[df_base_filtrada[MONTH_COL_NAME] == mes]
+
+    if sistema != 'Todos':
+        df_visual_filtrada = df_base_filtrada[df_base_filtrada[SYSTEM_COL_NAME] == sistema]
+    else:
+        df_visual_filtrada = df_base_filtrada
+
+    return df_base_filtrada, df_visual_filtrada
+
+def build_pivot(df_visual_filtrada, sistema='Todos'):
+    """Monta a tabela pivotada (Entidade[, Sistema] x Mês/Ano) com a linha e a coluna de 'Total Geral'."""
+    if sistema == 'Todos':
+        # Se 'Todos' estiver selecionado, detalha por Sistema
+        pivot_index = [ENTITY_COL_NAME, SYSTEM_COL_NAME]
+    else:
+        # Se um sistema específico estiver selecionado, agrupa apenas por Entidade
+        pivot_index = [ENTITY_COL_NAME]
+
+    df_pivot = pd.pivot_table(
+        df_visual_filtrada,
+        index=pivot_index,
+        columns=[MONTH_COL_NAME],
+        values=[COUNT_COL_NAME],
+        aggfunc='sum',
+        fill_value=0,
+        margins=True,
+        margins_name='Total Geral'
+    )
+
+    df_pivot.columns = df_pivot.columns.get_level_values(1)
+    return df_pivot
+
+def pivot_file_name(entidade, mes, sistema):
+    """Nome do arquivo XLSX da tabela pivotada para a combinação de filtros."""
+    entidade_tag = entidade.replace('Todas', 'ALL').replace(' ', '_').replace('/', '')
+    mes_tag = mes.replace('Todos', 'ALL').replace('/', '')
+    sistema_tag = sistema.replace('Todos', 'ALL').replace(' ', '_')
+
+    # Remove caracteres inválidos em nomes de arquivo (Windows)
+    file_name = f"PIVOT_{entidade_tag}_{mes_tag}_{sistema_tag}.xlsx"
+    return re.sub(r'[\\:*?"<>|]', '', file_name)
+
+# ----------------------------------------------------
+# Agregados do Dashboard (KPIs mensais e Leaderboard)
+# ----------------------------------------------------
+
+def month_sort_key(month_series):
+    """Chave de ordenação cronológica para valores 'MM/AAAA'."""
+    return pd.to_datetime(month_series, format=MONTH_FORMAT)
+
+def monthly_system_totals(df_visual_filtrada):
+    """Total de pedidos por Mês/Ano, com uma coluna por Sistema (Reserve e ARGOIT sempre presentes), em ordem cronológica."""
+    df_monthly_systems = df_visual_filtrada.groupby([MONTH_COL_NAME, SYSTEM_COL_NAME])[COUNT_COL_NAME].sum().unstack(fill_value=0).reset_index()
+    df_monthly_systems.columns.name = None
+
+    if 'Reserve' not in df_monthly_systems.columns: df_monthly_systems['Reserve'] = 0
+    if 'ARGOIT' not in df_monthly_systems.columns: df_monthly_systems['ARGOIT'] = 0
+
+    return df_monthly_systems.sort_values(MONTH_COL_NAME, key=month_sort_key).reset_index(drop=True)
+
+def top_entities_by_month(df_visual_filtrada, top_n=3):
+    """Ranking das `top_n` entidades por Mês/Ano (soma dos sistemas), com a abertura por Sistema."""
+    df_entity = df_visual_filtrada.groupby([MONTH_COL_NAME, ENTITY_COL_NAME, SYSTEM_COL_NAME])[COUNT_COL_NAME].sum().unstack(fill_value=0)
+    df_entity.columns.name = None
+    for system in ['Reserve', 'ARGOIT']:
+        if system not in df_entity.columns: df_entity[system] = 0
+    df_entity['Total'] = df_entity[['Reserve', 'ARGOIT']].sum(axis=1)
+    df_entity = df_entity.reset_index()
+
+    df_entity['Data Ordenacao'] = month_sort_key(df_entity[MONTH_COL_NAME])
+    # Empates no total são desempatados pelo nome da entidade, para que dashboard e API listem na mesma ordem
+    df_entity = df_entity.sort_values(['Data Ordenacao', 'Total', ENTITY_COL_NAME], ascending=[True, False, True])
+    df_entity['Posição'] = df_entity.groupby(MONTH_COL_NAME).cumcount() + 1
+    df_top = df_entity[df_entity['Posição'] <= top_n]
+
+    return df_top[[MONTH_COL_NAME, 'Posição', ENTITY_COL_NAME, 'Total', 'Reserve', 'ARGOIT']].reset_index(drop=True)
+
+# ----------------------------------------------------
+# Totais Diários Pré-calculados (Período e Tendência)
+# ----------------------------------------------------
+
+class DailyRollup:
+    """
+    Contagem de pedidos por (Entidade, Sistema), guardada como soma acumulada ao longo do tempo.
+    O total de qualquer período é a diferença entre duas colunas da matriz acumulada, sem reler os pedidos;
+    as séries semanais e mensais são derivadas da série diária.
+    Seguindo a retenção de compact_history, apenas os últimos `retention_months` meses têm uma coluna por dia;
+    os meses anteriores têm uma coluna por mês, e períodos que os incluem são arredondados para meses inteiros
+    (ver covered_period). Assim o tamanho da matriz não cresce com os dias de todo o histórico.
+    """
+
+    def __init__(self, df_final_consolidated, retention_months=DETAIL_RETENTION_MONTHS):
+        """Recebe a base completa (nível de pedido, com a coluna de Entidade de prepare_base_pivot)."""
+        day_values = df_final_consolidated[DATE_COL_NAME].dt.normalize()
+        self.first_day, self.last_day = day_values.min(), day_values.max()
+
+        # Início do detalhe diário (mesmo corte de compact_history)
+        self.daily_start = self.first_day
+        if retention_months:
+            self.daily_start = max(self.first_day, detail_cutoff(self.last_day, retention_months))
+
+        # Colunas da matriz: um mês por coluna antes de daily_start e um dia por coluna a partir dele,
+        # inclusive os dias sem pedidos, para que a posição na matriz corresponda ao período
+        monthly_buckets = pd.date_range(
+            self.first_day.to_period('M').to_timestamp(), self.daily_start - pd.DateOffset(months=1), freq='MS'
+        )
+        self.buckets = monthly_buckets.append(pd.date_range(self.daily_start, self.last_day, freq='D'))
+
+        bucket_positions = self.buckets.searchsorted(day_values, side='right') - 1
+        df_buckets = df_final_consolidated.assign(**{DAY_COL_NAME: bucket_positions}).groupby(
+            [ENTITY_COL_NAME, SYSTEM_COL_NAME, DAY_COL_NAME], dropna=False
+        ).size()
+
+        keys = df_buckets.index.droplevel(DAY_COL_NAME).unique()
+        self.entities = keys.get_level_values(0).to_numpy()
+        self.systems = keys.get_level_values(1).to_numpy()
+
+        counts = np.zeros((len(keys), len(self.buckets)), dtype=np.int64)
+        counts[
+            keys.get_indexer(df_buckets.index.droplevel(DAY_COL_NAME)),
+            df_buckets.index.get_level_values(DAY_COL_NAME).to_numpy(),
+        ] = df_buckets.to_numpy()
+
+        # Coluna 0 zerada: total de [início, fim] = cumulative[:, fim + 1] - cumulative[:, início]
+        self.cumulative = np.zeros((len(keys), len(self.buckets) + 1), dtype=np.int64)
+        np.cumsum(counts, axis=1, out=self.cumulative[:, 1:])
+
+    def _day_bounds(self, start, end):
+        """Posições (início, fim inclusivo) do período na matriz, ou None se o período não tiver dias na base."""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start > self.last_day or end < self.first_day:
+            return None
+        # Cada coluna cobre de seu início até o início da próxima (um mês inteiro antes de daily_start)
+        first = max(self.buckets.searchsorted(start, side='right') - 1, 0)
+        last = self.buckets.searchsorted(end, side='right') - 1
+        return (first, last) if first <= last else None
+
+    def covered_period(self, start, end):
+        """
+        Período (início, fim) efetivamente somado por range_totals e rollup, ou None se não houver dias na base.
+        Difere do período pedido quando ele passa dos limites da base ou inclui dias antes de daily_start
+        (arredondados para o mês inteiro).
+        """
+        bounds = self._day_bounds(start, end)
+        if bounds is None:
+            return None
+        first, last = bounds
+        covered_end = self.buckets[last + 1] - pd.Timedelta(days=1) if last + 1 < len(self.buckets) else self.last_day
+        return max(self.buckets[first], self.first_day), covered_end
+
+    def _key_mask(self, entidade='Todas', sistema='Todos'):
+        mask = np.ones(len(self.entities), dtype=bool)
+        if entidade != 'Todas':
+            mask &= self.entities == entidade
+        if sistema != 'Todos':
+            mask &= self.systems == sistema
+        return mask
+
+    def range_totals(self, start, end, entidade='Todas', sistema='Todos'):
+        """
+        Total de pedidos no período por (Entidade, Sistema), apenas as combinações com pedidos.
+        O período somado pode ser maior que o pedido antes de daily_start (ver covered_period).
+        """
+        columns = [ENTITY_COL_NAME, SYSTEM_COL_NAME, COUNT_COL_NAME]
+        bounds = self._day_bounds(start, end)
+        if bounds is None:
+            return pd.DataFrame(columns=columns)
+
+        first, last = bounds
+        mask = self._key_mask(entidade, sistema)
+        totals = self.cumulative[mask, last + 1] - self.cumulative[mask, first]
+
+        df_totals = pd.DataFrame({
+            ENTITY_COL_NAME: self.entities[mask], SYSTEM_COL_NAME: self.systems[mask], COUNT_COL_NAME: totals,
+        }, columns=columns)
+        return df_totals[df_totals[COUNT_COL_NAME] > 0].reset_index(drop=True)
+
+    def rollup(self, start, end, entidade='Todas', sistema='Todos', granularidade='Dia'):
+        """
+        Série de pedidos do período (uma coluna por Sistema), por Dia, Semana ou Mês (ver ROLLUP_FREQUENCIES).
+        Antes de daily_start só existem totais mensais: nas séries por Dia e Semana esse trecho fica sem valor (NaN).
+        """
+        system_names = ['Reserve', 'ARGOIT'] if sistema == 'Todos' else [sistema]
+        bounds = self._day_bounds(start, end)
+        if bounds is None:
+            return pd.DataFrame(columns=system_names, index=pd.DatetimeIndex([], name=DAY_COL_NAME))
+
+        first, last = bounds
+        mask = self._key_mask(entidade, sistema)
+        df_series = pd.DataFrame(index=pd.DatetimeIndex(self.buckets[first:last + 1], name=DAY_COL_NAME))
+        for system in system_names:
+            # Soma as chaves do sistema na matriz acumulada e volta para contagens diárias com np.diff
+            cumulative = self.cumulative[mask & (self.systems == system), first:last + 2].sum(axis=0)
+            df_series[system] = np.diff(cumulative)
+
+        if granularidade == 'Mês':
+            return df_series.resample(ROLLUP_FREQUENCIES[granularidade], label='left', closed='left').sum()
+
+        if df_series.index[0] < self.daily_start:
+            # Um dia por linha também antes de daily_start, sem valor: o total do mês não é distribuído entre os dias
+            covered_start, covered_end = self.covered_period(start, end)
+            df_series = df_series.reindex(pd.date_range(covered_start, covered_end, freq='D', name=DAY_COL_NAME))
+            df_series[df_series.index < self.daily_start] = np.nan
+        if granularidade != 'Dia':
+            df_series = df_series.resample(ROLLUP_FREQUENCIES[granularidade], label='left', closed='left').sum(min_count=1)
+            # Semanas que começam antes de daily_start ficariam com apenas parte dos dias
+            df_series[df_series.index < self.daily_start] = np.nan
+        return df_series
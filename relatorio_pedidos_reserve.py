@@ -3,38 +3,34 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import io
 import xlsxwriter
 import base64
 import os
 import glob 
+import time
 from datetime import datetime
 
-# --- 1. Configurações e Variáveis ---
+# Colunas, exportação e pivotamento compartilhados com as ferramentas headless
+from relatorio_comum import (
+    DATE_COL_NAME, ID_COL_NAME, GROUP_CODE_COL, EMP_COL_NAME, GROUP_COL_NAME, SYSTEM_COL_NAME,
+    CONSOLIDATED_FILE, ORANGE_COLOR, XLSX_MIME,
+    to_excel, to_excel_styled, load_consolidated_file, prepare_base_pivot, compact_history, filter_base, build_pivot, pivot_file_name,
+    monthly_system_totals, top_entities_by_month, DailyRollup, ROLLUP_FREQUENCIES, COUNT_COL_NAME, ENTITY_COL_NAME,
+)
 
-# Nomes de Colunas PADRÕES para unificação
-DATE_COL_NAME = 'data'
-ID_COL_NAME = 'pedido' 
-GROUP_CODE_COL = 'codigo grupo'
-EMP_COL_NAME = 'empresa'
-GROUP_COL_NAME = 'nome grupo'
-SYSTEM_COL_NAME = 'Sistema'
+# --- 1. Configurações e Variáveis ---
 
 # Arquivos de Entrada
 BASE_RESERVE_FILE = 'base.xlsx'
 LOGO_FILE = 'logo.png' 
 MAX_LOGO_HEIGHT = '80px'
 
-# Arquivo de Saída Consolidado
-CONSOLIDATED_FILE = 'base_consolidada.xlsx'
-
 # Constantes para o mapeamento de Grupos (Reserve)
 GRUPO_SHEET_NAME = 'GRUPOS'
 GRUPO_MAPPING_CODE_COL = 'Codigo'
 GRUPO_MAPPING_NAME_COL = 'Nome do Grupo'
 
 # --- DEFINIÇÃO DE CORES ---
-ORANGE_COLOR = '#ff8c00' # Laranja, usado para Reserve e para o estilo principal
 RESERVE_COLOR = ORANGE_COLOR # Cor específica para Reserve
 ARGOIT_COLOR = '#FFD700' # Amarelo Ouro, para ARGOIT
 BACKGROUND_COLOR_DARK_BLUE = '#131B36'
@@ -42,83 +38,9 @@ CONTRAST_BACKGROUND_COLOR = '#1D2A4A'
 DARK_BACKGROUND_COLOR = CONTRAST_BACKGROUND_COLOR
 
 # ----------------------------------------------------
-# Funções Auxiliares de Exportação e Imagem (CÓDIGO OMITIDO POR SER IDÊNTICO)
+# Funções Auxiliares de Imagem (Exportação em relatorio_comum.py)
 # ----------------------------------------------------
 
-def to_excel(df):
-    """Converte o DataFrame para um buffer de memória XLSX (Dados Brutos)."""
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name='Consolidado', index=False)
-    return output.getvalue()
-
-# (Função to_excel_styled idêntica)
-def to_excel_styled(df_pivot):
-    """Converte o DataFrame Pivotado para um buffer de memória XLSX aplicando estilos de totais."""
-    output = io.BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    sheet_name = 'Tabela_Pivotada'
-    df_pivot.to_excel(writer, sheet_name=sheet_name, index=True)
-
-    workbook = writer.book
-    worksheet = writer.sheets[sheet_name]
-
-    # Formatos de cor
-    header_format = workbook.add_format({
-        'bold': True, 'text_wrap': True, 'valign': 'top', 
-        'fg_color': ORANGE_COLOR, 'border': 1, 'font_color': 'white'
-    })
-
-    total_format = workbook.add_format({
-        'bold': True, 'fg_color': ORANGE_COLOR, 'border': 1, 
-        'font_color': 'white', 'num_format': '#,##0' 
-    })
-    
-    content_format_even = workbook.add_format({
-        'fg_color': 'white', 'border': 1, 'font_color': 'black', 'num_format': '#,##0'
-    })
-    
-    content_format_odd = workbook.add_format({
-        'fg_color': '#f0f2f6', 'border': 1, 'font_color': 'black', 'num_format': '#,##0'
-    })
-
-    # Obter dimensões e índice
-    num_rows, num_cols = df_pivot.shape
-    index_cols = len(df_pivot.index.names)
-
-    # 1. Aplicar estilo ao cabeçalho (Colunas)
-    for col_num, value in enumerate(df_pivot.columns.values):
-        worksheet.write(index_cols, col_num + index_cols, value, header_format) 
-    
-    # 2. Aplicar estilo às células de DADOS, LINHA DE TOTAIS e Índice
-    for row_num, (index, row) in enumerate(df_pivot.iterrows()):
-        is_total_row = (row_num == num_rows - 1)
-        
-        # Células de Dados (Meses/Ano - Exceto a última coluna de Total Geral)
-        for col_num in range(num_cols - 1): 
-            cell_format = total_format if is_total_row else (content_format_even if row_num % 2 == 0 else content_format_odd)
-            worksheet.write(row_num + index_cols + 1, col_num + index_cols, row.iloc[col_num], cell_format)
-            
-        # Célula de Total GERAL (Última Coluna)
-        worksheet.write(row_num + index_cols + 1, num_cols + index_cols - 1, row.iloc[-1], total_format)
-        
-        # Células de Índice (Linhas)
-        for i in range(index_cols):
-            index_value = index[i] if index_cols > 1 else index
-            worksheet.write(row_num + index_cols + 1, i, index_value, header_format)
-        
-    # Aplicar o formato de cabeçalho ao nome do índice (canto superior esquerdo)
-    for i in range(index_cols):
-        worksheet.write(i, i, df_pivot.index.names[i], header_format)
-
-    # Definir formato de Total Geral no canto inferior direito
-    if num_rows > 0 and num_cols > 0:
-        worksheet.write(num_rows + index_cols, num_cols + index_cols - 1, df_pivot.iloc[-1, -1], total_format)
-
-    writer.close()
-    return output.getvalue()
-
-
 def image_to_base64(file_path, file_type="png"):
     """Lê um arquivo de imagem (PNG) e codifica em Base64 para HTML."""
     if not os.path.exists(file_path):
@@ -322,7 +244,8 @@ def create_and_save_consolidated_base():
 def load_and_clean_data():
     """
     Tenta carregar a base consolidada e realiza o pré-processamento para o pivotamento.
-    Retorna o DF final (limpo) e um DF pronto para pivotar.
+    Retorna o DF pronto para pivotar, com os meses antigos compactados (ver DETAIL_RETENTION_MONTHS),
+    e os totais diários pré-calculados (DailyRollup) usados no filtro de período e na tendência diária.
     """
     df_final_consolidated = create_and_save_consolidated_base()
 
@@ -330,14 +253,25 @@ def load_and_clean_data():
         return None, None
 
     # 1. PRÉ-PROCESSAMENTO PARA O DASHBOARD (Criamos as colunas de Entidade e Mês/Ano)
-    df_final_consolidated['Entidade de Consolidação'] = df_final_consolidated[GROUP_COL_NAME].fillna(df_final_consolidated[EMP_COL_NAME])
-    df_final_consolidated['Mês/Ano'] = df_final_consolidated[DATE_COL_NAME].dt.strftime('%m/%Y')
-    df_final_consolidated['PKI Pedidos'] = 1
-    
-    # df_base_pivot é a base que será usada para todos os cálculos e visualizações
-    df_base_pivot = df_final_consolidated[['Entidade de Consolidação', 'Mês/Ano', 'PKI Pedidos', SYSTEM_COL_NAME, ID_COL_NAME]]
+    df_final_consolidated, df_base_pivot = prepare_base_pivot(df_final_consolidated)
+
+    # Totais diários calculados sobre o detalhe completo, antes da compactação dos meses antigos
+    daily_rollup = DailyRollup(df_final_consolidated)
+
+    # 2. HISTÓRICO EM CAMADAS: meses recentes no nível de pedido, meses antigos como contagens agregadas.
+    # O detalhe completo não fica em memória: a exportação lê a base consolidada em disco.
+    df_base_pivot = compact_history(df_base_pivot)
     
-    return df_final_consolidated, df_base_pivot # Retorna a base completa e a base para pivotar
+    return df_base_pivot, daily_rollup # Retorna a base para pivotar e os totais diários
+
+def build_consolidated_export(file_path):
+    """
+    Gera o XLSX da Base Bruta a partir da base consolidada em disco (armazenamento frio), com as mesmas colunas
+    do dashboard (Entidade de Consolidação, Mês/Ano, PKI Pedidos). Sem cache: o arquivo gerado não fica em memória
+    depois do download.
+    """
+    df_final_consolidated, _ = prepare_base_pivot(load_consolidated_file(file_path))
+    return to_excel(df_final_consolidated)
 
 # ----------------------------------------------------
 # --- 2. Interface Streamlit (CÓDIGO OMITIDO POR SER IDÊNTICO) ---
@@ -383,8 +317,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Carrega a base completa e a base limpa para pivotar/dashboard
-df_final_consolidated, df_base_pivot = load_and_clean_data()
+# Carrega a base limpa (em camadas) para pivotar/dashboard e os totais diários
+df_base_pivot, daily_rollup = load_and_clean_data()
 
 # --- INÍCIO DO DASHBOARD ---
 if df_base_pivot is not None and not df_base_pivot.empty:
@@ -433,20 +367,10 @@ if df_base_pivot is not None and not df_base_pivot.empty:
         sistema_selecionado = col3.selectbox('Selecione o Sistema', sistemas, key='sistema_filtro')
 
         # DF BASE: Aplicar filtros de Entidade e Mês/Ano
-        df_base_filtrada = df_base_pivot.copy()
-        
-        if entidade_selecionada != 'Todas':
-            df_base_filtrada = df_base_filtrada[df_base_filtrada['Entidade de Consolidação'] == entidade_selecionada]
-        
-        if mes_selecionado != 'Todos':
-            df_base_filtrada = df_base_filtrada[df_base_filtrada['Mês/Ano'] == mes_selecionado]
-            
-        
-        # DF VISUAL: Aplicar filtro de Sistema (Este DF é usado no KPI principal, Pivot, Leaderboard)
-        if sistema_selecionado != 'Todos':
-            df_visual_filtrada = df_base_filtrada[df_base_filtrada[SYSTEM_COL_NAME] == sistema_selecionado]
-        else:
-            df_visual_filtrada = df_base_filtrada
+        # DF VISUAL: Aplicar também o filtro de Sistema (Este DF é usado no KPI principal, Pivot, Leaderboard)
+        df_base_filtrada, df_visual_filtrada = filter_base(
+            df_base_pivot, entidade_selecionada, mes_selecionado, sistema_selecionado
+        )
             
         
         # --- CÁLCULO DOS KPIS ---
@@ -499,13 +423,7 @@ if df_base_pivot is not None and not df_base_pivot.empty:
         st.subheader("🚀 Total de Pedidos por Mês (KPIs Dinâmicos)")
 
         # Usamos df_visual_filtrada (já filtrado por sistema, se aplicável)
-        df_monthly_systems = df_visual_filtrada.groupby(['Mês/Ano', SYSTEM_COL_NAME])['PKI Pedidos'].sum().unstack(fill_value=0).reset_index()
-        
-        if 'Reserve' not in df_monthly_systems.columns: df_monthly_systems['Reserve'] = 0
-        if 'ARGOIT' not in df_monthly_systems.columns: df_monthly_systems['ARGOIT'] = 0
-        
-        df_monthly_systems['Data Ordenacao'] = pd.to_datetime(df_monthly_systems['Mês/Ano'], format='%m/%Y')
-        df_monthly_systems = df_monthly_systems.sort_values('Data Ordenacao').drop(columns='Data Ordenacao')
+        df_monthly_systems = monthly_system_totals(df_visual_filtrada)
         
         month_order = df_monthly_systems['Mês/Ano'].tolist()
         cols_per_row = 4
@@ -556,12 +474,8 @@ if df_base_pivot is not None and not df_base_pivot.empty:
         st.subheader("🏆 Top 3 Entidades (Leaderboard Mensal por Quantidade)")
 
         # df_visual_filtrada está filtrado por entidade, mês e sistema (se aplicável)
-        df_monthly_entity = df_visual_filtrada.groupby(['Mês/Ano', 'Entidade de Consolidação', SYSTEM_COL_NAME])['PKI Pedidos'].sum().reset_index()
-        df_monthly_entity.columns = ['Mês/Ano', 'Entidade', 'Sistema', 'Total Pedidos']
-        
-        # O ranking deve ser sempre baseado no total da entidade (soma dos sistemas)
-        df_rank = df_monthly_entity.groupby(['Mês/Ano', 'Entidade'])['Total Pedidos'].sum().reset_index()
-        df_rank.columns = ['Mês/Ano', 'Entidade', 'Total Rank']
+        # O ranking é baseado no total da entidade (soma dos sistemas), o mesmo usado pela API (/api/top)
+        df_top3 = top_entities_by_month(df_visual_filtrada, 3)
 
 
         cols_per_row_top3 = 4
@@ -581,22 +495,17 @@ if df_base_pivot is not None and not df_base_pivot.empty:
                         """, unsafe_allow_html=True
                     )
                     
-                    df_month_rank = df_rank[df_rank['Mês/Ano'] == month]
-                    df_top3_rank = df_month_rank.sort_values(by='Total Rank', ascending=False).head(3)
+                    df_top3_rank = df_top3[df_top3['Mês/Ano'] == month]
                     
                     if df_top3_rank.empty:
                         st.markdown("<p style='text-align: center; color: #888;'>S/Dados</p>", unsafe_allow_html=True)
                     else:
-                        max_pedidos_visual = df_top3_rank['Total Rank'].max() # Máximo entre as 3 entidades
+                        max_pedidos_visual = df_top3_rank['Total'].max() # Máximo entre as 3 entidades
                         
-                        for rank_num, (idx, row) in enumerate(df_top3_rank.iterrows()):
-                            entity_name = row['Entidade']
-                            total_pedidos_rank = row['Total Rank']
-                            
-                            df_entity_systems = df_monthly_entity[
-                                (df_monthly_entity['Mês/Ano'] == month) & 
-                                (df_monthly_entity['Entidade'] == entity_name)
-                            ]
+                        for _, row in df_top3_rank.iterrows():
+                            rank_num = row['Posição'] - 1
+                            entity_name = row[ENTITY_COL_NAME]
+                            total_pedidos_rank = row['Total']
                             
                             formatted_value = format_number(total_pedidos_rank)
                             
@@ -610,9 +519,8 @@ if df_base_pivot is not None and not df_base_pivot.empty:
                             )
                             
                             # Verifica a distribuição entre sistemas (se o filtro 'Todos' estiver ativo)
-                            for _, sys_row in df_entity_systems.iterrows():
-                                system = sys_row['Sistema']
-                                total_sys = sys_row['Total Pedidos']
+                            for system in ['ARGOIT', 'Reserve']:
+                                total_sys = row[system]
                                 
                                 # A barra de progresso usa a proporção do total do Sistema em relação ao total do MÁXIMO do top 3.
                                 if max_pedidos_visual > 0:
@@ -644,28 +552,13 @@ if df_base_pivot is not None and not df_base_pivot.empty:
     if df_visual_filtrada.empty:
         st.warning("Nenhum dado encontrado para a combinação de filtros selecionada.")
     else:
-        # CORREÇÃO: Indexação da pivot table
+        # CORREÇÃO: Indexação da pivot table (por Sistema apenas quando 'Todos' estiver selecionado)
         if sistema_selecionado == 'Todos':
-            # Se 'Todos' estiver selecionado, detalha por Sistema
-            pivot_index = ['Entidade de Consolidação', SYSTEM_COL_NAME]
             st.subheader("Tabela de Pedidos - Entidades, Sistemas por Mês/Ano")
         else:
-            # Se um sistema específico estiver selecionado, agrupa apenas por Entidade
-            pivot_index = ['Entidade de Consolidação']
             st.subheader(f"Tabela de Pedidos - Entidades ({sistema_selecionado}) por Mês/Ano")
             
-        df_pivot_final = pd.pivot_table(
-            df_visual_filtrada,
-            index=pivot_index, 
-            columns=['Mês/Ano'], 
-            values=['PKI Pedidos'], 
-            aggfunc='sum',
-            fill_value=0, 
-            margins=True, 
-            margins_name='Total Geral'
-        )
-
-        df_pivot_final.columns = df_pivot_final.columns.get_level_values(1)
+        df_pivot_final = build_pivot(df_visual_filtrada, sistema_selecionado)
 
         # --- FUNÇÃO DE ESTILO PARA O CONTEÚDO (APENAS DADOS) ---
         def highlight_content(data, color):
@@ -702,6 +595,75 @@ if df_base_pivot is not None and not df_base_pivot.empty:
         )
 
 
+    st.markdown("---")
+    
+    # ====================================================
+    # BLOCO 5: PERÍODO E TENDÊNCIA DIÁRIA (Totais Diários Pré-calculados)
+    # ====================================================
+    # Respeita os filtros de Entidade e Sistema; o período substitui o filtro de Mês/Ano.
+    # Como nos KPIs do topo, Reserve e ARGOIT no Período ignoram o filtro de Sistema (total real consolidado).
+    # Todos os números vêm de daily_rollup (somas acumuladas), sem varrer os pedidos.
+    
+    st.subheader("📅 Tendência Diária por Período")
+
+    col_periodo, col_granularidade = st.columns([2, 1])
+    periodo_selecionado = col_periodo.date_input(
+        'Selecione o Período',
+        # Padrão: apenas o trecho com detalhe diário (antes dele os totais são mensais)
+        value=(daily_rollup.daily_start.date(), daily_rollup.last_day.date()),
+        min_value=daily_rollup.first_day.date(),
+        max_value=daily_rollup.last_day.date(),
+        format='DD/MM/YYYY',
+        key='periodo_filtro'
+    )
+    granularidade_selecionada = col_granularidade.radio(
+        'Agrupar por', list(ROLLUP_FREQUENCIES.keys()), horizontal=True, key='granularidade_filtro'
+    )
+
+    # Durante a seleção no calendário o período pode ter apenas a data inicial
+    if len(periodo_selecionado) != 2:
+        st.info("Selecione a data inicial e a data final do período.")
+    else:
+        inicio_periodo, fim_periodo = periodo_selecionado
+        query_start = time.perf_counter()
+        # Período filtrado apenas por Entidade (para Reserve/ARGOIT) e também por Sistema (para o total e o ranking)
+        df_periodo_sistemas = daily_rollup.range_totals(inicio_periodo, fim_periodo, entidade_selecionada, 'Todos')
+        if sistema_selecionado != 'Todos':
+            df_periodo = df_periodo_sistemas[df_periodo_sistemas[SYSTEM_COL_NAME] == sistema_selecionado]
+        else:
+            df_periodo = df_periodo_sistemas
+        df_tendencia = daily_rollup.rollup(inicio_periodo, fim_periodo, entidade_selecionada, sistema_selecionado, granularidade_selecionada)
+        query_ms = (time.perf_counter() - query_start) * 1000
+
+        if df_periodo.empty:
+            st.warning("Nenhum pedido encontrado no período para a combinação de filtros selecionada.")
+        else:
+            col_total_periodo, col_reserve_periodo, col_argoit_periodo = st.columns(3)
+            total_sistemas_periodo = df_periodo_sistemas.groupby(SYSTEM_COL_NAME)[COUNT_COL_NAME].sum()
+            col_total_periodo.metric(label="Total no Período", value=format_number(df_periodo[COUNT_COL_NAME].sum()))
+            col_reserve_periodo.metric(label="Reserve no Período", value=format_number(total_sistemas_periodo.get('Reserve', 0)))
+            col_argoit_periodo.metric(label="ARGOIT no Período", value=format_number(total_sistemas_periodo.get('ARGOIT', 0)))
+
+            # Cores dos sistemas na mesma ordem das colunas da série
+            system_colors = {'Reserve': RESERVE_COLOR, 'ARGOIT': ARGOIT_COLOR}
+            st.line_chart(df_tendencia, color=[system_colors.get(system, ORANGE_COLOR) for system in df_tendencia.columns])
+
+            df_entidades_periodo = df_periodo.groupby(ENTITY_COL_NAME)[COUNT_COL_NAME].sum().sort_values(ascending=False).head(10).reset_index()
+            df_entidades_periodo.columns = ['Entidade', 'Total Pedidos']
+            st.markdown("#### Top 10 Entidades no Período")
+            st.dataframe(df_entidades_periodo, hide_index=True, use_container_width=True)
+
+        # Período efetivamente somado: antes de daily_start o período é arredondado para meses inteiros
+        periodo_coberto = daily_rollup.covered_period(inicio_periodo, fim_periodo)
+        if periodo_coberto is not None and periodo_coberto != (pd.Timestamp(inicio_periodo), pd.Timestamp(fim_periodo)):
+            st.caption(
+                f"Totais de {periodo_coberto[0].strftime('%d/%m/%Y')} a {periodo_coberto[1].strftime('%d/%m/%Y')}: "
+                f"antes de {daily_rollup.daily_start.strftime('%d/%m/%Y')} (fora da retenção em detalhe) os totais são mensais, "
+                "por isso o período é arredondado para meses inteiros e o gráfico por Dia ou Semana fica vazio nesse trecho (use 'Mês')."
+            )
+        st.caption(f"Consulta do período respondida em {query_ms:,.1f} ms a partir dos totais diários pré-calculados.")
+
+
     st.markdown("---")
     
     # ====================================================
@@ -715,20 +677,17 @@ if df_base_pivot is not None and not df_base_pivot.empty:
     with col_bruta:
         st.markdown("#### Base Bruta (Consolidada e Incremental)")
         try:
-            # Garante que o DF para download seja o final, limpo e salvo
-            df_to_download_consolidated = df_final_consolidated.drop_duplicates(subset=[ID_COL_NAME], keep='first').copy()
-            
-            if not df_to_download_consolidated.empty:
-                xlsx_data = to_excel(df_to_download_consolidated)
-
+            # O detalhe de todos os meses não fica em memória: o XLSX é gerado a partir da base consolidada em disco
+            # somente quando o usuário clica no botão (callable), e não a cada interação
+            if os.path.exists(CONSOLIDATED_FILE):
                 st.download_button(
                     label="📥 Download Base Consolidada",
-                    data=xlsx_data,
+                    data=lambda: build_consolidated_export(CONSOLIDATED_FILE),
                     file_name=f"INCREMENTAL_V10.4_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                    mime=XLSX_MIME
                 )
             else:
-                st.warning(f"O arquivo consolidado está vazio.")
+                st.warning(f"O arquivo consolidado '{CONSOLIDATED_FILE}' ainda não foi gerado.")
             
         except Exception as e:
             st.error(f"Não foi possível gerar o link de download da Base Consolidada. Detalhe: {e}")
@@ -740,17 +699,13 @@ if df_base_pivot is not None and not df_base_pivot.empty:
             if not df_pivot_final.empty:
                 xlsx_pivot_data = to_excel_styled(df_pivot_final)
                 
-                entidade_tag = entidade_selecionada.replace('Todas', 'ALL').replace(' ', '_').replace('/', '')
-                mes_tag = mes_selecionado.replace('Todos', 'ALL').replace('/', '')
-                sistema_tag = sistema_selecionado.replace('Todos', 'ALL').replace(' ', '_')
-                
-                file_name_pivot = f"PIVOT_{entidade_tag}_{mes_tag}_{sistema_tag}.xlsx"
+                file_name_pivot = pivot_file_name(entidade_selecionada, mes_selecionado, sistema_selecionado)
 
                 st.download_button(
                     label="📥 Download Tabela Pivotada",
                     data=xlsx_pivot_data,
                     file_name=file_name_pivot,
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                    mime=XLSX_MIME
                 )
             else:
                 st.info("Gere a tabela pivotada filtrando os dados primeiro.")
@@ -759,4 +714,4 @@ if df_base_pivot is not None and not df_base_pivot.empty:
             st.error(f"Não foi possível gerar o link de download da Tabela Pivotada. Detalhe: {e}")
             
 else:
-    st.error("❌ Falha crítica: Não foi possível processar ou carregar os dados. Verifique os arquivos de origem e os logs de erro acima.")
\ No newline at end of file
+    st.error("❌ Falha crítica: Não foi possível processar ou carregar os dados. Verifique os arquivos de origem e os logs de erro acima.")
\ No newline at end of file
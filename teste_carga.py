@@ -0,0 +1,423 @@
+# TESTE DE CARGA - Simula N sessões simultâneas do dashboard (Streamlit AppTest), totalmente offline
+#
+# Uso:
+#   python teste_carga.py                                 -> 4 sessões x 20 interações sobre workbooks sintéticos
+#   python teste_carga.py --sessoes 8 --interacoes 50     -> mais carga
+#   python teste_carga.py --amostra                       -> usa os workbooks da pasta do projeto (base.xlsx, *ARGO*.xlsx)
+#   python teste_carga.py --limite-p95 2.5 --json-saida carga.json
+#
+# Como no servidor real, todas as sessões rodam como threads de um único processo: o cache (st.cache_data) e o GIL
+# são compartilhados. O aquecimento executa o app uma vez (grava a base consolidada e popula o cache); depois cada
+# sessão faz a sua primeira execução e repete interações aleatórias nos filtros (Entidade, Mês/Ano, Sistema) e nos
+# controles da evolução diária (Período e Agrupar por). Cada rerun reconstrói KPIs, leaderboard, pivot, a evolução
+# por período e o download da Tabela Pivotada (to_excel_styled), exatamente como acontece no navegador.
+# O download da Base Bruta (to_excel) só é gerado quando o usuário clica no botão e por isso não entra na medição.
+# CPU e memória são medidas no processo: a memória por sessão é o crescimento da memória do processo durante as
+# sessões dividido pelo número de sessões. Funciona no Linux, macOS e Windows (no macOS a memória
+# medida é o pico do processo).
+
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError: # Windows (ver _current_memory_mb)
+    resource = None
+
+APP_FILE = 'relatorio_pedidos_reserve.py'
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Arquivos do projeto copiados para a pasta de trabalho isolada do teste
+APP_SUPPORT_FILES = [APP_FILE, 'relatorio_comum.py', 'logo.png']
+SAMPLE_PATTERNS = ['base.xlsx', '*ARGO*.xlsx', '*argo*.xlsx']
+
+FILTER_KEYS = ['entidade_filtro', 'mes_filtro', 'sistema_filtro']
+PERIOD_KEY = 'periodo_filtro'
+GRANULARITY_KEY = 'granularidade_filtro'
+INTERACTION_KEYS = FILTER_KEYS + [PERIOD_KEY, GRANULARITY_KEY]
+PERCENTILES = [50, 90, 95, 99]
+APP_TIMEOUT = 300
+# Intervalo de amostragem da memória do processo durante as sessões
+MEMORY_SAMPLE_SECONDS = 0.1
+
+# ----------------------------------------------------
+# Preparação dos Dados (Sintéticos ou Amostra)
+# ----------------------------------------------------
+
+def write_synthetic_workbooks(work_dir, num_months, orders_per_month, num_entities, seed):
+    """Gera base.xlsx (Reserve + GRUPOS) e um ARGO-*.xlsx por mês, no mesmo layout dos arquivos reais."""
+    rng = random.Random(seed)
+    first_month = datetime(datetime.now().year, datetime.now().month, 1)
+    months = []
+    for i in range(num_months):
+        year, month = divmod(first_month.month - 1 - i, 12)
+        months.append(datetime(first_month.year + year, month + 1, 1))
+    months.reverse()
+
+    group_codes = list(range(1000, 1000 + num_entities))
+    group_names = [f"GRUPO SINTETICO {i:03d}" for i in range(num_entities)]
+
+    reserve_rows = []
+    next_id = 1
+    for month_start in months:
+        for _ in range(orders_per_month):
+            day = month_start + timedelta(days=rng.randrange(28), minutes=rng.randrange(24 * 60))
+            code = rng.choice(group_codes)
+            reserve_rows.append([day, next_id, code, f"EMPRESA {code}", None])
+            next_id += 1
+
+    df_reserve = pd.DataFrame(reserve_rows, columns=['data', 'pedido', 'codigo grupo', 'empresa', 'nome grupo'])
+    df_grupos = pd.DataFrame({'Codigo': group_codes, 'Nome do Grupo': group_names})
+    with pd.ExcelWriter(os.path.join(work_dir, 'base.xlsx'), engine='xlsxwriter') as writer:
+        df_reserve.to_excel(writer, sheet_name='base', index=False)
+        df_grupos.to_excel(writer, sheet_name='GRUPOS', index=False)
+
+    for month_start in months:
+        argoit_rows = []
+        for _ in range(orders_per_month):
+            day = month_start + timedelta(days=rng.randrange(28), minutes=rng.randrange(24 * 60))
+            argoit_rows.append([day.strftime('%d/%m/%Y %H:%M'), f"A{next_id}", f"EMPRESA {rng.choice(group_codes)}", rng.choice(group_names)])
+            next_id += 1
+        df_argoit = pd.DataFrame(argoit_rows, columns=['Data Inclusao', 'Numero da Solicitacao', 'Empresa de Débito', 'Cliente'])
+        # O app lê com header=1: a primeira linha da planilha fica vazia
+        df_argoit.to_excel(os.path.join(work_dir, f"ARGO-{month_start.strftime('%m-%Y')}.xlsx"), index=False, startrow=1, engine='xlsxwriter')
+
+def copy_sample_workbooks(work_dir):
+    """Copia os workbooks de origem da pasta do projeto (sem a base consolidada, que é recriada)."""
+    copied = set()
+    for pattern in SAMPLE_PATTERNS:
+        for file_path in glob.glob(os.path.join(PROJECT_DIR, pattern)):
+            if not os.path.basename(file_path).startswith('~$'):
+                copied.add(file_path)
+    for file_path in copied:
+        shutil.copy(file_path, work_dir)
+    return len(copied)
+
+def prepare_workspace(args, work_dir):
+    """Copia o app e os dados para a pasta de trabalho do teste e gera a base consolidada uma única vez."""
+    for file_name in APP_SUPPORT_FILES:
+        if os.path.exists(os.path.join(PROJECT_DIR, file_name)):
+            shutil.copy(os.path.join(PROJECT_DIR, file_name), work_dir)
+
+    if args.amostra:
+        num_files = copy_sample_workbooks(work_dir)
+        print(f"ℹ️ {num_files} workbooks de amostra copiados para '{work_dir}'.")
+    else:
+        write_synthetic_workbooks(work_dir, args.meses, args.pedidos_mes, args.entidades, args.semente)
+        print(f"ℹ️ Workbooks sintéticos gerados em '{work_dir}' ({args.meses} meses x {args.pedidos_mes:,.0f} pedidos por sistema).")
+
+    # Aquecimento: a primeira execução cria base_consolidada.xlsx, evitando que as sessões gravem o arquivo ao mesmo tempo,
+    # e popula o cache compartilhado pelas sessões. O app lê e grava os arquivos de dados no diretório atual
+    from streamlit.testing.v1 import AppTest
+    os.chdir(work_dir)
+    # Caminho absoluto: um caminho relativo seria resolvido a partir deste arquivo, e não da pasta de trabalho
+    at = AppTest.from_file(os.path.join(work_dir, APP_FILE), default_timeout=APP_TIMEOUT).run()
+    if at.exception:
+        raise RuntimeError(f"O app falhou na execução de aquecimento: {at.exception[0].message}")
+    options = {key: at.selectbox(key=key).options for key in FILTER_KEYS}
+    period = at.date_input(key=PERIOD_KEY)
+    options[PERIOD_KEY] = [period.min + timedelta(days=i) for i in range((period.max - period.min).days + 1)]
+    options[GRANULARITY_KEY] = at.radio(key=GRANULARITY_KEY).options
+    return options
+
+# ----------------------------------------------------
+# Sessões Simuladas
+# ----------------------------------------------------
+
+def _current_memory_mb():
+    """Memória residente atual do processo (MB). No macOS retorna o pico, único valor disponível sem dependências."""
+    if resource is None:
+        # Windows: WorkingSetSize de GetProcessMemoryInfo (psapi)
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+            ]
+
+        kernel32 = ctypes.WinDLL('kernel32')
+        psapi = ctypes.WinDLL('psapi')
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize / (1024 * 1024)
+
+    if os.path.exists('/proc/self/statm'):
+        # Linux: segunda coluna = páginas residentes
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+    # ru_maxrss é reportado em bytes no macOS (em KB nos demais Unix)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class MemorySampler(threading.Thread):
+    """Amostra a memória do processo em segundo plano e guarda o maior valor observado."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.baseline_mb = _current_memory_mb()
+        self.peak_mb = self.baseline_mb
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(MEMORY_SAMPLE_SECONDS):
+            self.peak_mb = max(self.peak_mb, _current_memory_mb())
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.peak_mb = max(self.peak_mb, _current_memory_mb())
+
+def _record_errors(result, at, context):
+    """Guarda as mensagens das exceções do último run (com contagem) e retorna se houve alguma."""
+    for exception in at.exception:
+        message = f"{context}: {exception.message}"
+        result['mensagens_erro'][message] = result['mensagens_erro'].get(message, 0) + 1
+    result['erros'] += len(at.exception)
+    return len(at.exception) > 0
+
+def apply_interaction(at, options, rng):
+    """Altera um controle aleatório do app (sem executar) e retorna a descrição da interação para o relatório de erros."""
+    # Um rerun com exceção para no erro: os controles depois dele não existem na tela
+    present = {widget.key for widget in [*at.selectbox, *at.date_input, *at.radio]}
+    key = rng.choice([key for key in INTERACTION_KEYS if key in present] or FILTER_KEYS)
+    if key == PERIOD_KEY:
+        start, end = sorted(rng.choice(options[key]) for _ in range(2))
+        at.date_input(key=key).set_value((start, end))
+        return f"{key}={start:%d/%m/%Y}-{end:%d/%m/%Y}"
+    value = rng.choice(options[key])
+    if key == GRANULARITY_KEY:
+        at.radio(key=key).set_value(value)
+    else:
+        at.selectbox(key=key).select(value)
+    return f"{key}={value}"
+
+def new_session_result(session_id):
+    # Reruns que terminaram em exceção são medidos à parte: o script para no erro e a latência fica subestimada
+    return {
+        'sessao': session_id, 'erros': 0, 'mensagens_erro': {}, 'latencias': [], 'latencias_erro': [],
+        'primeira_execucao_s': 0.0, 'concluida': False,
+    }
+
+def run_session(app_path, options, interactions, seed, start_barrier, result):
+    """Executa uma sessão (em uma thread): primeira execução e depois `interactions` mudanças de filtro ou período, medindo cada rerun."""
+    rng = random.Random(seed + result['sessao'])
+
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        start = time.perf_counter()
+        at = AppTest.from_file(app_path, default_timeout=APP_TIMEOUT).run()
+        result['primeira_execucao_s'] = time.perf_counter() - start
+        _record_errors(result, at, 'primeira execução')
+
+        # Todas as sessões começam as interações ao mesmo tempo (sem esperar para sempre por uma sessão que falhou)
+        try:
+            start_barrier.wait(timeout=APP_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+
+        for _ in range(interactions):
+            context = apply_interaction(at, options, rng)
+            start = time.perf_counter()
+            at.run()
+            latency = time.perf_counter() - start
+            if _record_errors(result, at, context):
+                result['latencias_erro'].append(latency)
+            else:
+                result['latencias'].append(latency)
+    except Exception as e:
+        message = f"sessão interrompida: {type(e).__name__} - {e}"
+        result['mensagens_erro'][message] = result['mensagens_erro'].get(message, 0) + 1
+        result['erros'] += 1
+        # Libera as sessões que ainda aguardam na barreira de início
+        start_barrier.abort()
+
+    result['concluida'] = True
+
+def wait_sessions(threads, session_results, start_barrier, timeout_seconds):
+    """
+    Aguarda as sessões até `timeout_seconds` no total. Sessões que não terminarem a tempo são contadas como erro;
+    as threads são daemon e não impedem o encerramento do teste.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    for thread in threads:
+        thread.join(timeout=max(deadline - time.monotonic(), 0))
+
+    for thread, result in zip(threads, session_results):
+        if result['concluida']:
+            continue
+        if thread.is_alive():
+            reason = f"sessão sem resultado após {timeout_seconds:,.0f}s (thread abandonada)"
+            # Libera as sessões que ainda aguardam na barreira de início
+            start_barrier.abort()
+        else:
+            reason = "thread da sessão terminou sem resultado"
+        result['mensagens_erro'][reason] = result['mensagens_erro'].get(reason, 0) + 1
+        result['erros'] += 1
+    return session_results
+
+# ----------------------------------------------------
+# Relatório
+# ----------------------------------------------------
+
+def percentiles(values):
+    if not values:
+        return {f"p{p}": 0.0 for p in PERCENTILES}
+    return {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+
+def build_report(session_results, wall_seconds, process_cpu_seconds, memory):
+    """
+    Consolida as métricas por sessão e o total de todas as sessões.
+    Os percentis consideram apenas os reruns sem exceção; os reruns com erro têm contagem e mediana próprias.
+    A memória é do processo (compartilhada pelas sessões): o crescimento durante o teste é dividido por sessão.
+    """
+    sessions = []
+    all_latencies = []
+    all_error_latencies = []
+    for result in sorted(session_results, key=lambda r: r['sessao']):
+        result.pop('concluida')
+        latencies = result.pop('latencias')
+        error_latencies = result.pop('latencias_erro')
+        all_latencies.extend(latencies)
+        all_error_latencies.extend(error_latencies)
+        result.update(percentiles(latencies))
+        result['reruns'] = len(latencies)
+        result['max'] = max(latencies) if latencies else 0.0
+        result['reruns_erro'] = len(error_latencies)
+        result['p50_erro'] = float(np.percentile(error_latencies, 50)) if error_latencies else 0.0
+        sessions.append(result)
+
+    total = {
+        'sessoes': len(sessions),
+        'reruns': len(all_latencies),
+        'reruns_erro': len(all_error_latencies),
+        'p50_erro': float(np.percentile(all_error_latencies, 50)) if all_error_latencies else 0.0,
+        'segundos_total': wall_seconds,
+        'reruns_por_segundo': (len(all_latencies) + len(all_error_latencies)) / wall_seconds if wall_seconds > 0 else 0.0,
+        'erros': sum(s['erros'] for s in sessions),
+        'cpu_s': process_cpu_seconds,
+        'memoria_inicial_mb': memory.baseline_mb,
+        'memoria_pico_mb': memory.peak_mb,
+        'memoria_por_sessao_mb': (memory.peak_mb - memory.baseline_mb) / len(sessions) if sessions else 0.0,
+        'max': max(all_latencies, default=0.0),
+    }
+    total.update(percentiles(all_latencies))
+    return {'gerado_em': datetime.now().isoformat(timespec='seconds'), 'sessoes': sessions, 'total': total}
+
+def print_report(report):
+    columns = (
+        ['sessao', 'primeira_execucao_s', 'reruns'] + [f"p{p}" for p in PERCENTILES]
+        + ['max', 'reruns_erro', 'p50_erro', 'erros']
+    )
+    df_sessions = pd.DataFrame(report['sessoes'])[columns]
+    print("\n📊 Latência por rerun sem erro (segundos) e reruns com erro, por sessão:")
+    print(df_sessions.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+
+    sessions_with_errors = [s for s in report['sessoes'] if s['mensagens_erro']]
+    if sessions_with_errors:
+        print("\n❌ Erros por sessão (contexto: mensagem x ocorrências):")
+        for session in sessions_with_errors:
+            for message, count in session['mensagens_erro'].items():
+                print(f"  sessão {session['sessao']} | {message} x{count}")
+
+    total = report['total']
+    print(
+        f"\n✅ {total['sessoes']} sessões, {total['reruns']} reruns sem erro e {total['reruns_erro']} com erro "
+        f"em {total['segundos_total']:.2f}s ({total['reruns_por_segundo']:.2f} reruns/s) | "
+        + " ".join(f"p{p}={total[f'p{p}']:.3f}s" for p in PERCENTILES)
+        + f" max={total['max']:.3f}s | p50 com erro={total['p50_erro']:.3f}s"
+        + f" | CPU do processo {total['cpu_s']:.1f}s | memória {total['memoria_inicial_mb']:.0f} -> {total['memoria_pico_mb']:.0f} MB"
+        + f" (+{total['memoria_por_sessao_mb']:.1f} MB por sessão) | erros {total['erros']}"
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga offline do dashboard com sessões simultâneas (Streamlit AppTest).")
+    parser.add_argument('--sessoes', type=int, default=4, help="Número de sessões simultâneas (padrão: 4).")
+    parser.add_argument('--interacoes', type=int, default=20, help="Mudanças de filtro ou período por sessão (padrão: 20).")
+    parser.add_argument('--amostra', action='store_true', help="Usa os workbooks da pasta do projeto em vez de dados sintéticos.")
+    parser.add_argument('--meses', type=int, default=6, help="Meses de dados sintéticos (padrão: 6).")
+    parser.add_argument('--pedidos-mes', type=int, default=2000, help="Pedidos sintéticos por mês e sistema (padrão: 2000).")
+    parser.add_argument('--entidades', type=int, default=50, help="Entidades sintéticas (padrão: 50).")
+    parser.add_argument('--semente', type=int, default=42, help="Semente aleatória dos dados e das interações (padrão: 42).")
+    parser.add_argument('--json-saida', default=None, help="Grava o relatório completo neste arquivo JSON.")
+    parser.add_argument('--limite-p95', type=float, default=None, help="Falha (código 1) se o p95 total passar deste valor em segundos.")
+    parser.add_argument('--timeout-sessao', type=float, default=None,
+                        help="Tempo máximo (s) para as sessões terminarem (padrão: APP_TIMEOUT x (interações + 2)).")
+    parser.add_argument('--manter-pasta', action='store_true', help="Não apaga a pasta de trabalho temporária ao final.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    original_dir = os.getcwd()
+
+    timeout_seconds = args.timeout_sessao or APP_TIMEOUT * (args.interacoes + 2)
+
+    work_dir = tempfile.mkdtemp(prefix='teste_carga_')
+    try:
+        print("🔄 Preparando a pasta de trabalho e executando o aquecimento...")
+        options = prepare_workspace(args, work_dir)
+
+        app_path = os.path.join(work_dir, APP_FILE)
+        start_barrier = threading.Barrier(args.sessoes)
+        session_results = [new_session_result(session_id) for session_id in range(args.sessoes)]
+        threads = [
+            threading.Thread(
+                target=run_session,
+                args=(app_path, options, args.interacoes, args.semente, start_barrier, result),
+                name=f"sessao-{result['sessao']}", daemon=True,
+            )
+            for result in session_results
+        ]
+
+        print(f"🚀 Iniciando {args.sessoes} sessões x {args.interacoes} interações...")
+        memory = MemorySampler()
+        memory.start()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        wait_sessions(threads, session_results, start_barrier, timeout_seconds)
+        wall_seconds = time.perf_counter() - start
+        process_cpu_seconds = time.process_time() - cpu_start
+        memory.stop()
+    finally:
+        os.chdir(original_dir)
+        if not args.manter_pasta:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = build_report(session_results, wall_seconds, process_cpu_seconds, memory)
+    print_report(report)
+
+    if args.json_saida:
+        with open(args.json_saida, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"ℹ️ Relatório salvo em '{args.json_saida}'.")
+
+    if args.limite_p95 is not None and report['total']['p95'] > args.limite_p95:
+        print(f"❌ p95 de {report['total']['p95']:.3f}s acima do limite de {args.limite_p95:.3f}s.")
+        return 1
+    return 1 if report['total']['erros'] else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())